@@ -33,6 +33,10 @@ def register():
     try:
         # Register the main thread executor timer FIRST (must be on main thread)
         _main._ensure_timer_registered()
+        if _main.SERVE_ON_MAIN_THREAD:
+            # Poll the server from a timer; no background thread needed
+            _main.start_server_on_main_thread()
+            return
         # start_server blocks, so run it in a daemon thread
         t = threading.Thread(target=_main.start_server, daemon=True)
         t.start()
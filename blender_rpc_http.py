@@ -1,6 +1,7 @@
 # blender_mcp_server.py -----------------------------------------------
 # A minimal MCP (Model Context Protocol) server that runs inside Blender.
-# Implements the MCP protocol over HTTP using only Python stdlib.
+# Implements the MCP protocol over HTTP using only Python stdlib
+# (orjson or msgspec is used for JSON-RPC marshalling when installed).
 #
 # MCP Methods:
 #   • initialize   - Handshake, returns server capabilities
@@ -9,29 +10,107 @@
 #
 # Install as a Blender add-on. Server listens on http://0.0.0.0:8765
 #
+import collections
+import email.utils
+import functools
+import io
 import json
+import os
+import selectors
+import socket
+import sys
 import traceback
 import threading
-import queue
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
 
 # ------------------------------------------------------------------
 # Configuration
 # ------------------------------------------------------------------
 HOST = "0.0.0.0"
 PORT = 8765
+MAX_WORKERS = 16  # Maximum number of connections served concurrently
+MAX_QUEUED_EXECUTIONS = 256  # Pending main-thread executions before rejecting
+KEEP_ALIVE_TIMEOUT = 60  # Seconds an idle keep-alive connection stays open
+MAX_REQUEST_BYTES = 4 * 1024 * 1024  # Larger request bodies are rejected (413)
+MAX_TEMPLATES = 256  # Templates registered at once before rejecting new names
+# Serve HTTP from a Blender timer on the main thread instead of a server
+# thread. Trades request concurrency for no cross-thread handoff.
+SERVE_ON_MAIN_THREAD = os.environ.get("BLENDER_RPC_MAIN_THREAD", "") not in ("", "0")
+# Print an access log line per request (errors are always printed)
+LOG_REQUESTS = os.environ.get("BLENDER_RPC_LOG", "") not in ("", "0")
+# Attach the server-side traceback to internal error responses
+DEBUG_ERRORS = os.environ.get("BLENDER_RPC_DEBUG", "") not in ("", "0")
+
+# ------------------------------------------------------------------
+# JSON codec: prefer orjson, then msgspec (both C extensions), and fall
+# back to stdlib json. _dumps always returns UTF-8 encoded bytes;
+# _DECODE_ERRORS lists what _loads raises on malformed input.
+# ------------------------------------------------------------------
+_DECODE_ERRORS = (json.JSONDecodeError, UnicodeDecodeError)
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    try:
+        import msgspec
+
+        _dumps = msgspec.json.encode
+        _loads = msgspec.json.decode
+        _DECODE_ERRORS += (msgspec.DecodeError,)
+    except ImportError:
+
+        def _dumps(obj) -> bytes:
+            return json.dumps(obj).encode("utf-8")
+
+        _loads = json.loads
 
 # ------------------------------------------------------------------
 # Thread-safe execution queue for main thread execution
 # ------------------------------------------------------------------
-_execution_queue = queue.Queue()
+_execution_queue = collections.deque()
+# Serializes producers (bound check + append). The main thread is the only
+# consumer and pops without it, since deque.popleft() is atomic.
+_execution_lock = threading.Lock()
+_MAX_TASKS_PER_TICK = 64  # Keep Blender's UI responsive under bursts
+_TICK_BUDGET = 0.05  # Seconds of work per timer tick before yielding
+_POLL_INTERVAL_MIN = 0.005  # Timer interval right after handling work
+_POLL_INTERVAL_MAX = 0.05  # Timer interval after a long idle stretch
+_EXEC_SWITCH_INTERVAL = 0.1  # sys.setswitchinterval() while running user code
+_idle_ticks = 0
 _timer_registered = False
+
+
+def _log(message: str):
+    """
+    Print a server diagnostic to the process's original stderr. sys.stdout
+    and sys.stderr may be swapped for a running script's capture buffers at
+    any moment, and those must only receive that script's own output.
+    """
+    stream = sys.__stderr__
+    if stream is not None:
+        print(message, file=stream, flush=True)
+
+
+class ServerBusyError(RuntimeError):
+    """Raised when the main-thread execution queue is full."""
+
+
+class BatchTooLargeError(ValueError):
+    """Raised for a batch with more executions than the queue can ever hold."""
+
+
 _running_in_blender = False
+_bpy = None  # The bpy module when importable, resolved once at load
 
 # Check if we're running inside Blender
 try:
     import bpy
 
+    _bpy = bpy
     _running_in_blender = hasattr(bpy, "app") and hasattr(bpy.app, "timers")
 except ImportError:
     _running_in_blender = False
@@ -40,112 +119,367 @@ except ImportError:
 # ------------------------------------------------------------------
 # Shared code execution helper
 # ------------------------------------------------------------------
-def _run_code_sandboxed(code: str, bpy_module=None) -> dict:
+class _ListIO(io.TextIOBase):
+    """
+    Minimal text sink for captured output; joins the writes on demand.
+    The buffer is only allocated on the first write, since most snippets
+    print nothing. Like StringIO, write() only accepts str, so getvalue()
+    cannot fail on what user code wrote.
+    """
+
+    encoding = "utf-8"
+
+    def __init__(self):
+        self.buf = None
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        if not isinstance(s, str):
+            raise TypeError(f"write() argument must be str, not {type(s).__name__}")
+        if self.buf is None:
+            self.buf = [s]
+        else:
+            self.buf.append(s)
+        return len(s)
+
+    def getvalue(self) -> str:
+        return "".join(self.buf) if self.buf else ""
+
+
+# Namespace every execution starts from. A single dict serves as both
+# globals and locals, so top-level names are visible inside functions.
+_NS_TEMPLATE = {"__builtins__": __builtins__}
+if _bpy is not None:
+    _NS_TEMPLATE["bpy"] = _bpy
+
+# Expose Numba's JIT to submitted code when it is installed. Use
+# @njit(cache=True) so repeated calls reuse the on-disk machine code, and
+# @njit(parallel=True, nogil=True) with prange for threaded kernels.
+try:
+    from numba import njit, prange
+
+    _NS_TEMPLATE["njit"] = njit
+    _NS_TEMPLATE["prange"] = prange
+except ImportError:
+    pass
+
+
+_JSON_START_CHARS = frozenset('{["tfn-0123456789')
+_MAX_CACHED_SOURCE = 64 * 1024  # Larger sources are compiled uncached
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_cached(code: str):
+    """Compile submitted source once; agents often resend identical snippets."""
+    return compile(code, "<mcp-exec>", "exec")
+
+
+def _compile_code(code: str):
+    """
+    Compile code through the cache. Very large sources bypass it, so the
+    cache's memory stays bounded by size as well as by entry count.
+    """
+    if len(code) > _MAX_CACHED_SOURCE:
+        return compile(code, "<mcp-exec>", "exec")
+    return _compile_cached(code)
+
+
+# Code objects registered with the register_template tool, by name
+_TEMPLATES = {}
+_templates_lock = threading.Lock()
+
+
+def _register_template(arguments: dict) -> dict:
+    """Compile a template once and store it for later call_template calls."""
+    name = arguments.get("name")
+    if not isinstance(name, str) or not name:
+        raise ValueError("Template name must be a non-empty string")
+    try:
+        template = compile(arguments.get("code", ""), f"<tmpl:{name}>", "exec")
+    except (SyntaxError, ValueError) as exc:
+        return {"content": [{"type": "text", "text": f"Error: {exc}"}], "isError": True}
+    with _templates_lock:
+        # Re-registering a name replaces it, so only new names count
+        if name not in _TEMPLATES and len(_TEMPLATES) >= MAX_TEMPLATES:
+            raise ValueError(f"Too many templates registered (max {MAX_TEMPLATES})")
+        _TEMPLATES[name] = template
+    return {"content": [{"type": "text", "text": f"Template '{name}' registered."}]}
+
+
+def _template_job(arguments: dict) -> tuple:
+    """Return the (code, bindings) a call_template call executes."""
+    name = arguments.get("name")
+    template = _TEMPLATES.get(name)
+    if template is None:
+        raise ValueError(f"Unknown template: {name}")
+    bindings = arguments.get("bindings") or {}
+    if not isinstance(bindings, dict):
+        raise TypeError("Template bindings must be an object")
+    return template, bindings
+
+
+def _user_traceback(tb):
+    """
+    Drop the server's own frames from a traceback, so it starts at the first
+    frame of submitted code. None when there is none, e.g. for a SyntaxError
+    raised while compiling (its message already points into the code).
+    """
+    while tb is not None and not tb.tb_frame.f_code.co_filename.startswith(
+        ("<mcp-exec>", "<tmpl:")
+    ):
+        tb = tb.tb_next
+    return tb
+
+
+class _ExecResult:
+    """
+    Outcome of one code execution.
+
+    result_json holds the stripped stdout text when result was parsed from
+    it, so it can be reported without re-serializing. error is None or a
+    dict with message, type and exception.
+    """
+
+    __slots__ = ("error", "output", "result", "result_json", "stderr")
+
+    def __init__(self):
+        self.result = None
+        self.result_json = None
+        self.error = None
+        self.output = ""
+        self.stderr = ""
+
+
+def _run_code_sandboxed(code, bindings: dict | None = None) -> _ExecResult:
     """
     Execute code in a sandboxed namespace with stdout/stderr capture.
 
     Args:
-        code: Python code to execute
-        bpy_module: Optional bpy module to inject (None = try to import)
+        code: Python source, or an already compiled code object
+        bindings: Names to predefine in the namespace (template parameters)
 
     Returns:
-        Dict with keys: result, error, output, stderr
+        _ExecResult with result, result_json, error, output and stderr
     """
-    import io
-    import contextlib
+    result = _ExecResult()
+    stdout_capture = _ListIO()
+    stderr_capture = _ListIO()
 
-    result = {"result": None, "error": None, "output": "", "stderr": ""}
-    stdout_capture = io.StringIO()
-    stderr_capture = io.StringIO()
+    # Fresh copy of the prebuilt namespace so executions stay isolated
+    ns = _NS_TEMPLATE.copy()
+    if bindings:
+        ns.update(bindings)
 
-    # Build namespace
-    global_ns = {"__builtins__": __builtins__}
-    local_ns = {}
-
-    if bpy_module is not None:
-        global_ns["bpy"] = local_ns["bpy"] = bpy_module
-    else:
+    try:
+        if isinstance(code, str):
+            code = _compile_code(code)
+        # Swap the streams directly; cheaper than two redirect_* managers
+        old_stdout, old_stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = stdout_capture, stderr_capture
         try:
-            import bpy
+            exec(code, ns)
+        finally:
+            sys.stdout, sys.stderr = old_stdout, old_stderr
 
-            global_ns["bpy"] = local_ns["bpy"] = bpy
-        except ImportError:
-            pass
+        result.output = stdout_capture.getvalue()
+        result.stderr = stderr_capture.getvalue()
 
+        # Extract result: explicit 'result' variable, or parse stdout as JSON, or raw output
+        if "result" in ns:
+            result.result = ns["result"]
+        else:
+            stripped = result.output.strip()
+            result.result = stripped if stripped else None
+            # Only attempt a parse when the text can start a JSON value;
+            # a failed parse raises, which is costly for plain log output.
+            if stripped and stripped[0] in _JSON_START_CHARS:
+                try:
+                    result.result = _loads(stripped)
+                    result.result_json = stripped
+                except (*_DECODE_ERRORS, ValueError, RecursionError):
+                    pass  # Not JSON after all; keep the raw text
+
+    except (Exception, SystemExit) as exc:
+        # sys.exit() in user code is an error in that code, not a reason to
+        # end the serving thread. Keep the exception (minus this frame) and
+        # format the traceback only if the client asks for it.
+        result.error = {
+            "message": str(exc),
+            "type": type(exc).__name__,
+            "exception": exc.with_traceback(_user_traceback(exc.__traceback__)),
+        }
+        result.output = stdout_capture.getvalue()
+        result.stderr = stderr_capture.getvalue()
+
+    return result
+
+
+def _execute_on_main_thread(code, bindings: dict | None = None) -> _ExecResult:
+    """
+    Queue code for execution on Blender's main thread and wait for result.
+    Thread-safe and can be called from any thread. Raises ServerBusyError
+    instead of queueing when MAX_QUEUED_EXECUTIONS requests are pending.
+    """
+    future = Future()
+    with _execution_lock:
+        if len(_execution_queue) >= MAX_QUEUED_EXECUTIONS:
+            raise ServerBusyError("Server busy, retry later")
+        _execution_queue.append((code, bindings, future))
     try:
-        with (
-            contextlib.redirect_stdout(stdout_capture),
-            contextlib.redirect_stderr(stderr_capture),
-        ):
-            exec(code, global_ns, local_ns)
+        return future.result(timeout=300)  # 5 minute timeout
+    except FutureTimeoutError:
+        # Don't let the main thread run code nobody is waiting for anymore
+        future.cancel()
+        raise TimeoutError("Timed out waiting for Blender's main thread") from None
 
-        result["output"] = stdout_capture.getvalue()
-        result["stderr"] = stderr_capture.getvalue()
 
-        # Extract result: explicit 'result' variable, or parse stdout as JSON, or raw output
-        if "result" in local_ns:
-            result["result"] = local_ns["result"]
-        else:
-            stripped = result["output"].strip()
-            try:
-                result["result"] = json.loads(stripped)
-            except Exception:
-                result["result"] = stripped if stripped else None
+def _execute_on_main_thread_batch(jobs: list[tuple]) -> list[_ExecResult]:
+    """
+    Queue several (code, bindings) jobs at once so the main-thread timer runs
+    them back-to-back in a single wakeup, then wait for all results in order.
+    """
+    if len(jobs) > MAX_QUEUED_EXECUTIONS:
+        # Retrying can never succeed, so don't report it as busy
+        raise BatchTooLargeError(
+            f"Batch exceeds {MAX_QUEUED_EXECUTIONS} code executions"
+        )
+    futures = [Future() for _ in jobs]
+    with _execution_lock:
+        if len(_execution_queue) + len(jobs) > MAX_QUEUED_EXECUTIONS:
+            raise ServerBusyError("Server busy, retry later")
+        _execution_queue.extend(
+            (code, bindings, future) for (code, bindings), future in zip(jobs, futures)
+        )
+    try:
+        return [future.result(timeout=300) for future in futures]
+    except FutureTimeoutError:
+        for future in futures:
+            future.cancel()
+        raise TimeoutError("Timed out waiting for Blender's main thread") from None
 
-    except Exception as exc:
-        result["error"] = {"message": str(exc), "traceback": traceback.format_exc()}
-        result["output"] = stdout_capture.getvalue()
-        result["stderr"] = stderr_capture.getvalue()
 
-    return result
+def _needs_main_thread_handoff() -> bool:
+    """True when code must be queued for Blender's main thread."""
+    # bpy API is not thread-safe; requests served on the main thread itself
+    # (SERVE_ON_MAIN_THREAD) run directly.
+    return (
+        _running_in_blender
+        and _timer_registered
+        and threading.current_thread() is not threading.main_thread()
+    )
+
+
+# Code starting with this marker declares itself free of side effects, so
+# identical concurrent requests for it may share one execution.
+_PURE_MARKER = "# @pure"
+_inflight = {}  # Source -> Future of its running execution
+_inflight_lock = threading.Lock()
 
 
-def _execute_directly(code: str) -> dict:
-    """Execute code directly (used when not running inside Blender)."""
-    return _run_code_sandboxed(code)
+# Direct executions swap the process-wide sys.stdout/sys.stderr, so they
+# must not overlap. (Main-thread executions are serialized by the timer.)
+_direct_exec_lock = threading.Lock()
 
 
-def _execute_on_main_thread(code: str) -> dict:
+def _execute_code(code, bindings: dict | None = None) -> _ExecResult:
+    """Execute code on the right thread for the current environment."""
+    if isinstance(code, str) and code.startswith(_PURE_MARKER):
+        return _execute_coalesced(code)
+    if _needs_main_thread_handoff():
+        return _execute_on_main_thread(code, bindings)
+    with _direct_exec_lock:
+        return _run_code_sandboxed(code, bindings)
+
+
+def _execute_coalesced(code: str) -> _ExecResult:
     """
-    Queue code for execution on Blender's main thread and wait for result.
-    Thread-safe and can be called from any thread.
+    Execute pure code once for all identical requests in flight: the first
+    caller runs it, later callers wait for and share its result.
     """
-    result_holder = {"result": None, "error": None, "output": "", "stderr": ""}
-    result_event = threading.Event()
-    _execution_queue.put((code, result_event, result_holder))
-    result_event.wait(timeout=300)  # 5 minute timeout
-    return result_holder
+    with _inflight_lock:
+        future = _inflight.get(code)
+        owner = future is None
+        if owner:
+            future = _inflight[code] = Future()
+    if not owner:
+        return future.result()
+
+    try:
+        if _needs_main_thread_handoff():
+            result = _execute_on_main_thread(code)
+        else:
+            with _direct_exec_lock:
+                result = _run_code_sandboxed(code)
+    except Exception as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _inflight_lock:
+            del _inflight[code]
+
+
+def _execute_code_batch(jobs: list[tuple]) -> list[_ExecResult]:
+    """Execute (code, bindings) jobs in order, batching main-thread handoff."""
+    if _needs_main_thread_handoff():
+        return _execute_on_main_thread_batch(jobs)
+    with _direct_exec_lock:
+        return [_run_code_sandboxed(code, bindings) for code, bindings in jobs]
 
 
 def _process_execution_queue() -> float:
     """
-    Timer callback on Blender's main thread. Processes pending code requests.
-    Returns interval until next call (0.01 seconds).
+    Timer callback on Blender's main thread. Runs pending code requests,
+    up to _MAX_TASKS_PER_TICK or _TICK_BUDGET seconds per tick.
+    Returns interval until next call: 0.0 while a backlog remains, otherwise
+    _POLL_INTERVAL_MIN, growing linearly to _POLL_INTERVAL_MAX while idle.
     """
-    import bpy
-
+    global _idle_ticks
+    if not _execution_queue:
+        _idle_ticks += 1
+        return min(_POLL_INTERVAL_MAX, _POLL_INTERVAL_MIN * _idle_ticks)
+
+    # Keep the GIL on the main thread while user code runs, so server threads
+    # don't wake every 5 ms to contend for it between bpy calls.
+    old_switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(_EXEC_SWITCH_INTERVAL)
     try:
-        code, result_event, result_holder = _execution_queue.get_nowait()
-    except queue.Empty:
-        return 0.01
+        processed = 0
+        deadline = time.monotonic() + _TICK_BUDGET
+        while processed < _MAX_TASKS_PER_TICK and time.monotonic() < deadline:
+            try:
+                code, bindings, future = _execution_queue.popleft()
+            except IndexError:
+                break
+            if not future.set_running_or_notify_cancel():
+                continue  # The caller gave up waiting
+            try:
+                future.set_result(_run_code_sandboxed(code, bindings))
+            # The caller must always get an answer and the timer must survive,
+            # even if user code raises SystemExit
+            except BaseException as exc:  # noqa: BLE001
+                future.set_exception(exc)
+            processed += 1
+    finally:
+        sys.setswitchinterval(old_switch_interval)
 
-    # Run code and copy results into the shared holder
-    exec_result = _run_code_sandboxed(code, bpy_module=bpy)
-    result_holder.update(exec_result)
-    result_event.set()
-    return 0.01
+    _idle_ticks = 0
+    return 0.0 if _execution_queue else _POLL_INTERVAL_MIN
 
 
 def _ensure_timer_registered():
     """Register the execution queue processor timer if not already registered."""
     global _timer_registered
-    if not _timer_registered:
-        import bpy
-
-        if not bpy.app.timers.is_registered(_process_execution_queue):
-            bpy.app.timers.register(_process_execution_queue, persistent=True)
-            _timer_registered = True
-            print("[blender-rpc] Main thread executor timer registered.")
+    if not _timer_registered and not _bpy.app.timers.is_registered(
+        _process_execution_queue
+    ):
+        _bpy.app.timers.register(_process_execution_queue, persistent=True)
+        _timer_registered = True
+        _log("[blender-rpc] Main thread executor timer registered.")
 
 
 # ------------------------------------------------------------------
@@ -166,11 +500,52 @@ TOOLS = [
                 "code": {
                     "type": "string",
                     "description": "Python code to execute. Use 'result = ...' to return a value.",
-                }
+                },
+                "verbose": {
+                    "type": "boolean",
+                    "description": "Include the full traceback if the code raises.",
+                },
             },
             "required": ["code"],
         },
-    }
+    },
+    {
+        "name": "register_template",
+        "description": (
+            "Compile Python code once and store it under a name, to be run "
+            "later with call_template."
+        ),
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string", "description": "Template name."},
+                "code": {
+                    "type": "string",
+                    "description": "Python code; its free names are filled from bindings.",
+                },
+            },
+            "required": ["name", "code"],
+        },
+    },
+    {
+        "name": "call_template",
+        "description": "Execute a registered template with the given variable bindings.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string", "description": "Template name."},
+                "bindings": {
+                    "type": "object",
+                    "description": "Variables defined before the template runs.",
+                },
+                "verbose": {
+                    "type": "boolean",
+                    "description": "Include the full traceback if the code raises.",
+                },
+            },
+            "required": ["name"],
+        },
+    },
 ]
 
 
@@ -181,7 +556,13 @@ def _handle_initialize(params):
     """MCP initialize handshake."""
     return {
         "protocolVersion": PROTOCOL_VERSION,
-        "capabilities": {"tools": {}},
+        "capabilities": {
+            "tools": {},
+            # Lets clients rate-limit before hitting -32000 "Server busy"
+            "experimental": {
+                "blender": {"maxQueuedExecutions": MAX_QUEUED_EXECUTIONS}
+            },
+        },
         "serverInfo": {"name": SERVER_NAME, "version": SERVER_VERSION},
     }
 
@@ -191,38 +572,41 @@ def _handle_tools_list(params):
     return {"tools": TOOLS}
 
 
-def _handle_tools_call_sync(params):
-    """Execute a tool by name (synchronous version for HTTP handler)."""
+def _handle_tools_call_sync(params, result=None):
+    """
+    Execute a tool by name (synchronous version for HTTP handler).
+
+    ``result`` may carry an execution result obtained ahead of time (see
+    _handle_batch); otherwise the code is executed here.
+    """
     tool_name = params.get("name")
     arguments = params.get("arguments", {})
 
-    if tool_name != "execute_code":
+    if tool_name == "register_template":
+        return _register_template(arguments)
+    if tool_name not in ("execute_code", "call_template"):
         raise ValueError(f"Unknown tool: {tool_name}")
 
-    code = arguments.get("code", "")
+    if result is None:
+        result = _execute_code(*_code_job(tool_name, arguments))
 
-    # Use main thread execution in Blender (bpy API is not thread-safe)
-    if _running_in_blender and _timer_registered:
-        result = _execute_on_main_thread(code)
-    else:
-        result = _execute_directly(code)
-
-    if result["error"]:
-        return {
-            "content": [
-                {"type": "text", "text": f"Error: {result['error']['message']}"}
-            ],
-            "isError": True,
-        }
+    if result.error:
+        text = f"Error: {result.error['message']}"
+        # get, not pop: coalesced callers share the same result
+        exc = result.error.get("exception")
+        if arguments.get("verbose") and exc is not None:
+            text += "\n" + "".join(traceback.format_exception(exc))
+        return {"content": [{"type": "text", "text": text}], "isError": True}
 
     # Format output
     output_parts = []
-    if result["result"] is not None:
-        output_parts.append(f"Result: {json.dumps(result['result'])}")
-    if result["output"]:
-        output_parts.append(f"Output:\n{result['output']}")
-    if result["stderr"]:
-        output_parts.append(f"Stderr:\n{result['stderr']}")
+    if result.result is not None:
+        result_json = result.result_json or json.dumps(result.result)
+        output_parts.append(f"Result: {result_json}")
+    if result.output:
+        output_parts.append(f"Output:\n{result.output}")
+    if result.stderr:
+        output_parts.append(f"Stderr:\n{result.stderr}")
 
     text = "\n".join(output_parts) if output_parts else "Code executed successfully."
     return {"content": [{"type": "text", "text": text}]}
@@ -235,81 +619,313 @@ _MCP_METHODS = {
     "tools/call": _handle_tools_call_sync,
 }
 
+# Pre-serialized results of the static handshake methods; handle_rpc splices
+# the request id in instead of rebuilding and re-encoding them per call.
+_STATIC_RESULTS = {
+    "initialize": _dumps(_handle_initialize({})),
+    "tools/list": _dumps(_handle_tools_list({})),
+}
+
+# Body returned by GET /
+_SERVER_INFO_BYTES = _dumps(
+    {
+        "name": SERVER_NAME,
+        "version": SERVER_VERSION,
+        "protocol": "MCP",
+        "protocolVersion": PROTOCOL_VERSION,
+        "transport": "HTTP",
+    }
+)
+
 
 # ------------------------------------------------------------------
 # JSON-RPC Handler
 # ------------------------------------------------------------------
-def handle_rpc(message: str) -> str | None:
-    """Parse JSON-RPC request, dispatch to MCP handler, return JSON response."""
-    req = None
+def _is_wide_int(value) -> bool:
+    """True for an integer the fast JSON codecs can't represent (over 64 bits)."""
+    return isinstance(value, int) and not -(2**63) <= value < 2**64
+
+
+def _has_float_id(req) -> bool:
+    """True if a parsed request, or any request of a batch, has a float id."""
+    if isinstance(req, list):
+        return any(_has_float_id(item) for item in req)
+    return isinstance(req, dict) and isinstance(req.get("id"), float)
+
+
+def _dumps_id(req_id) -> bytes:
+    """Encode a request id exactly as the client sent it."""
+    if _is_wide_int(req_id):
+        return json.dumps(req_id).encode("utf-8")
+    return _dumps(req_id)
+
+
+def _serialize_response(response: dict) -> bytes:
+    """Serialize a JSON-RPC response, degrading to an error if that fails."""
+    try:
+        if _is_wide_int(response.get("id")):
+            return json.dumps(response).encode("utf-8")
+        return _dumps(response)
+    except Exception as e:
+        _log(f"Error serializing response: {e}")
+        return b'{"jsonrpc":"2.0","id":%s,"error":%s}' % (
+            _dumps_id(response.get("id")),
+            _dumps({"code": -32603, "message": "Response serialization failed"}),
+        )
+
+
+def _handle_request(req, exec_result=None) -> bytes | None:
+    """
+    Dispatch one parsed JSON-RPC request and return its serialized response.
+
+    ``exec_result`` is a result (or exception) of an execute_code call that
+    was already run as part of a batch.
+    """
+    if not isinstance(req, dict):
+        return _serialize_response(
+            {
+                "jsonrpc": "2.0",
+                "id": None,
+                "error": {"code": -32600, "message": "Invalid Request"},
+            }
+        )
+
+    # Notifications (no id) don't get responses
+    if "id" not in req:
+        return None
+    req_id = req["id"]
+
     try:
-        req = json.loads(message)
         method = req.get("method")
 
-        # Notifications (no id) don't get responses
-        if "id" not in req:
-            return None
+        static_result = _STATIC_RESULTS.get(method)
+        if static_result is not None:
+            return b'{"jsonrpc":"2.0","id":%s,"result":%s}' % (
+                _dumps_id(req_id),
+                static_result,
+            )
 
         if method not in _MCP_METHODS:
             raise NotImplementedError(f"Method '{method}' not supported")
 
-        handler = _MCP_METHODS[method]
         params = req.get("params", {})
-        result = handler(params)
+        if isinstance(exec_result, Exception):
+            raise exec_result
+        if exec_result is not None:
+            result = _handle_tools_call_sync(params, exec_result)
+        else:
+            result = _MCP_METHODS[method](params)
+
+        response = {"jsonrpc": "2.0", "id": req_id, "result": result}
+
+    except Exception as exc:
+        _log(f"MCP Error: {exc}")
+        if isinstance(exc, ServerBusyError):
+            code = -32000  # Server-defined error telling clients to back off
+        elif isinstance(exc, BatchTooLargeError):
+            code = -32600  # Invalid request; must be split, not retried
+        else:
+            code = -32603
+        error = {"code": code, "message": str(exc)}
+        # Unknown methods and queue rejections have no useful traceback
+        if DEBUG_ERRORS and not isinstance(
+            exc, (NotImplementedError, ServerBusyError, BatchTooLargeError)
+        ):
+            error["data"] = "".join(traceback.format_exception(exc))
+        response = {"jsonrpc": "2.0", "id": req_id, "error": error}
+
+    return _serialize_response(response)
+
+
+def _code_job(tool_name: str, arguments: dict) -> tuple:
+    """Return the (code, bindings) an execute_code or call_template call runs."""
+    if tool_name == "call_template":
+        return _template_job(arguments)
+    return arguments.get("code", ""), None
+
+
+def _batchable_job(req) -> tuple | None:
+    """
+    Return the (code, bindings) of a tools/call request (not notification)
+    that executes code, or None if it can't be run ahead as part of a batch.
+    """
+    if not isinstance(req, dict) or "id" not in req or req.get("method") != "tools/call":
+        return None
+    params = req.get("params", {})
+    if not isinstance(params, dict):
+        return None
+    tool_name = params.get("name")
+    arguments = params.get("arguments", {})
+    if tool_name not in ("execute_code", "call_template") or not isinstance(
+        arguments, dict
+    ):
+        return None
+    try:
+        return _code_job(tool_name, arguments)
+    except (TypeError, ValueError):
+        return None  # Reported when the request is handled on its own
+
+
+def _is_register_template_call(req) -> bool:
+    """True for a tools/call request of register_template."""
+    if not isinstance(req, dict) or req.get("method") != "tools/call":
+        return False
+    params = req.get("params", {})
+    return isinstance(params, dict) and params.get("name") == "register_template"
+
+
+def _handle_batch(reqs: list) -> list[bytes]:
+    """
+    Dispatch a JSON-RPC batch. All execute_code and call_template calls are
+    executed up front as one batch so Blender's main thread runs them in a
+    single wakeup. A batch that registers templates is handled strictly in
+    order instead, so its calls see the templates it registers.
+    """
+    code_indices = []
+    jobs = []
+    if not any(_is_register_template_call(req) for req in reqs):
+        for i, req in enumerate(reqs):
+            job = _batchable_job(req)
+            if job is not None:
+                code_indices.append(i)
+                jobs.append(job)
+    exec_results = {}
+    if code_indices:
+        try:
+            exec_results = dict(zip(code_indices, _execute_code_batch(jobs)))
+        except Exception as exc:  # noqa: BLE001
+            # Report any failure on every call of the batch without re-running
+            exec_results = dict.fromkeys(code_indices, exc)
+
+    responses = []
+    for i, req in enumerate(reqs):
+        response = _handle_request(req, exec_results.get(i))
+        if response is not None:
+            responses.append(response)
+    return responses
 
-        response = {"jsonrpc": "2.0", "id": req["id"], "result": result}
 
-    except json.JSONDecodeError as exc:
-        print(f"MCP JSON Parse Error: {exc}")
+def handle_rpc(message: str | bytes) -> bytes | None:
+    """
+    Parse a JSON-RPC request or batch, dispatch to the MCP handlers and
+    return the UTF-8 encoded JSON response (None when nothing needs to be
+    sent back).
+    """
+    try:
+        req = _loads(message)
+    except _DECODE_ERRORS as exc:
+        _log(f"MCP JSON Parse Error: {exc}")
         response = {
             "jsonrpc": "2.0",
             "id": None,
             "error": {"code": -32700, "message": "Parse error: " + str(exc)},
         }
-    except Exception as exc:
-        print(f"MCP Error: {exc}")
-        response = {
-            "jsonrpc": "2.0",
-            "id": req.get("id") if req else None,
-            "error": {"code": -32603, "message": str(exc)},
-        }
+        return _dumps(response)
 
-    try:
-        return json.dumps(response)
-    except Exception as e:
-        print(f"Error serializing response: {e}")
-        return json.dumps(
-            {
-                "jsonrpc": "2.0",
-                "id": req.get("id") if req else None,
-                "error": {"code": -32603, "message": "Response serialization failed"},
-            }
-        )
+    # orjson reads integers beyond 64 bits as floats; re-read such requests
+    # with the stdlib parser so their ids are echoed back exactly
+    if _loads is not json.loads and _has_float_id(req):
+        req = json.loads(message)
+
+    if isinstance(req, list) and req:
+        responses = _handle_batch(req)
+        if not responses:
+            return None
+        return b"[" + b",".join(responses) + b"]"
+
+    return _handle_request(req)
 
 
 # ------------------------------------------------------------------
 # HTTP Handler for MCP Streamable HTTP transport
 # ------------------------------------------------------------------
+_CORS_HEADERS = (
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"Access-Control-Allow-Methods: POST, OPTIONS\r\n"
+    b"Access-Control-Allow-Headers: Content-Type\r\n"
+)
+_MAX_COALESCED_BODY = 64 * 1024  # Larger bodies are written after the headers
+_KEEP_ALIVE_HEADERS = (
+    b"Connection: keep-alive\r\nKeep-Alive: timeout=%d\r\n" % KEEP_ALIVE_TIMEOUT
+)
+_date_cache = (0, b"")  # (second, Date header line) of the last response
+
+
+def _date_header() -> bytes:
+    """Return the Date header line, formatted at most once per second."""
+    global _date_cache
+    now = int(time.time())
+    second, header = _date_cache
+    if second != now:
+        date = email.utils.formatdate(now, usegmt=True)
+        header = b"Date: %s\r\n" % date.encode("ascii")
+        _date_cache = (now, header)
+    return header
+
+
 class MCPHTTPHandler(BaseHTTPRequestHandler):
     """HTTP request handler for MCP protocol."""
 
     protocol_version = "HTTP/1.1"
+    # Small JSON-RPC responses on keep-alive connections would otherwise be
+    # held back by Nagle's algorithm until the client's delayed ACK fires.
+    disable_nagle_algorithm = True
+    # Close idle keep-alive connections so they don't hold a worker slot forever
+    timeout = KEEP_ALIVE_TIMEOUT
+
+    # What send_response() would send as the Server header
+    _server_header = b"Server: %s\r\n" % (
+        BaseHTTPRequestHandler.server_version + " " + BaseHTTPRequestHandler.sys_version
+    ).encode("ascii")
 
     def log_message(self, format, *args):
         """Override to prefix log messages."""
-        print(f"[blender-rpc HTTP] {args[0]}")
+        _log(f"[blender-rpc HTTP] {args[0]}")
+
+    def log_error(self, format, *args):
+        """Don't report idle keep-alive connections timing out as errors."""
+        if args and isinstance(args[0], TimeoutError) and not LOG_REQUESTS:
+            return
+        super().log_error(format, *args)
+
+    def log_request(self, code="-", size="-"):
+        """Log the request only when LOG_REQUESTS is enabled."""
+        if LOG_REQUESTS:
+            super().log_request(code, size)
 
     def _send_json_response(self, status_code: int, data: dict):
         """Send a JSON response with proper headers."""
-        body = json.dumps(data).encode("utf-8")
-        self.send_response(status_code)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(body)))
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "POST, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
-        self.end_headers()
-        self.wfile.write(body)
+        self._send_raw_json(status_code, _dumps(data))
+
+    def _send_raw_json(self, status_code: int, body: bytes):
+        """
+        Send an already-serialized JSON body. Status line, headers and body
+        go out in a single write instead of one per header plus the body;
+        only bodies over _MAX_COALESCED_BODY are written separately.
+        """
+        self.log_request(status_code)
+        head = (
+            b"%s %d %s\r\n"
+            b"Content-Type: application/json\r\n"
+            b"Content-Length: %d\r\n"
+        ) % (
+            self.protocol_version.encode("ascii"),
+            status_code,
+            self.responses[status_code][0].encode("ascii"),
+            len(body),
+        )
+        head += _date_header() + self._server_header
+        if self.close_connection:
+            head += b"Connection: close\r\n"
+        else:
+            head += _KEEP_ALIVE_HEADERS
+        head += _CORS_HEADERS + b"\r\n"
+        if len(body) > _MAX_COALESCED_BODY:
+            # Copying a large body just to save one write isn't worth it
+            self.wfile.write(head)
+            self.wfile.write(body)
+        else:
+            self.wfile.write(head + body)
 
     def _send_error_response(self, status_code: int, error_code: int, message: str):
         """Send a JSON-RPC error response."""
@@ -338,9 +954,16 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
         if content_length == 0:
             self._send_error_response(400, -32700, "Empty request body")
             return
+        if content_length > MAX_REQUEST_BYTES:
+            # The body is left unread, so the connection can't be reused
+            self.close_connection = True
+            self._send_error_response(
+                413, -32600, f"Request body exceeds {MAX_REQUEST_BYTES} bytes"
+            )
+            return
 
         try:
-            body = self.rfile.read(content_length).decode("utf-8")
+            body = self.rfile.read(content_length)
         except Exception as e:
             self._send_error_response(400, -32700, f"Failed to read request: {e}")
             return
@@ -349,28 +972,19 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
         try:
             response = handle_rpc(body)
             if response is not None:
-                self._send_json_response(200, json.loads(response))
+                self._send_raw_json(200, response)
             else:
                 # Notification - no response needed, send 204
                 self.send_response(204)
                 self.end_headers()
         except Exception as e:
-            print(f"[blender-rpc HTTP] Error processing request: {e}")
+            _log(f"[blender-rpc HTTP] Error processing request: {e}")
             self._send_error_response(500, -32603, f"Internal error: {e}")
 
     def do_GET(self):
         """Handle GET requests - return server info."""
         if self.path in ("/", ""):
-            self._send_json_response(
-                200,
-                {
-                    "name": SERVER_NAME,
-                    "version": SERVER_VERSION,
-                    "protocol": "MCP",
-                    "protocolVersion": PROTOCOL_VERSION,
-                    "transport": "HTTP",
-                },
-            )
+            self._send_raw_json(200, _SERVER_INFO_BYTES)
         else:
             self._send_error_response(404, -32600, f"Not found: {self.path}")
 
@@ -378,27 +992,166 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
 # ------------------------------------------------------------------
 # HTTP Server startup/shutdown
 # ------------------------------------------------------------------
+_BUSY_BODY = _dumps(
+    {
+        "jsonrpc": "2.0",
+        "id": None,
+        "error": {"code": -32000, "message": "Server busy, retry later"},
+    }
+)
+# Written straight to the socket by the accept loop, which has no handler
+# Sent after the status line and Date header
+_BUSY_RESPONSE = (
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: %d\r\n"
+    b"Connection: close\r\n"
+    b"Retry-After: 1\r\n\r\n" % len(_BUSY_BODY)
+) + _BUSY_BODY
+
+
+_BUSY_DRAIN_LIMIT = 64 * 1024  # Request bytes read from a rejected connection
+_BUSY_DRAIN_TIMEOUT = 1.0  # Seconds a rejected connection may take to finish
+
+
+def _reject_busy(sock):
+    """
+    Answer a connection with _BUSY_RESPONSE and close it. The request is
+    drained first (up to a limit): closing with unread data makes the kernel
+    reset the connection, and the client would never see the 503.
+    """
+    try:
+        sock.settimeout(_BUSY_DRAIN_TIMEOUT)
+        sock.sendall(
+            b"HTTP/1.1 503 Service Unavailable\r\n" + _date_header() + _BUSY_RESPONSE
+        )
+        sock.shutdown(socket.SHUT_WR)
+        received = 0
+        while received < _BUSY_DRAIN_LIMIT:
+            chunk = sock.recv(16384)
+            if not chunk:
+                break  # Client closed after reading the response
+            received += len(chunk)
+    except OSError:
+        pass
+    finally:
+        sock.close()
+
+
+class MCPHTTPServer(ThreadingHTTPServer):
+    """
+    HTTP server that serves each connection on its own daemon thread.
+
+    At most ``max_workers`` connections are handled concurrently; further
+    connections are answered with 503 and closed from a short-lived thread,
+    so the accept loop never blocks and shutdown() always returns.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+    # listen() backlog; the default of 5 drops SYNs from bursts of clients
+    # connecting at once, costing them a 1 s+ connect retry.
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, max_workers=MAX_WORKERS):
+        super().__init__(server_address, handler_class)
+        self._worker_slots = threading.BoundedSemaphore(max_workers)
+
+    def process_request(self, request, client_address):
+        """Serve the connection on a thread, or reject it if no slot is free."""
+        if not self._worker_slots.acquire(blocking=False):
+            threading.Thread(target=_reject_busy, args=(request,), daemon=True).start()
+            return
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self._worker_slots.release()
+            raise
+
+    def handle_error(self, request, client_address):
+        """Log an unhandled handler error; the default writes to sys.stderr."""
+        _log(
+            f"[blender-rpc HTTP] Error serving {client_address}:\n"
+            + traceback.format_exc()
+        )
+
+    def process_request_thread(self, request, client_address):
+        """Serve one connection and give its worker slot back."""
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._worker_slots.release()
+
+
+class _MainThreadMCPHTTPHandler(MCPHTTPHandler):
+    """
+    Handler used when serving from Blender's main thread: one request per
+    connection and a short read timeout, so an idle or slow client cannot
+    hold up Blender's UI.
+    """
+
+    protocol_version = "HTTP/1.0"
+    timeout = 5
+
+
 _http_server = None
+_http_selector = None  # Set while serving from a Blender timer
 
 
 def start_server():
     """Start the HTTP server (blocking)."""
     global _http_server
     try:
-        _http_server = HTTPServer((HOST, PORT), MCPHTTPHandler)
-        print(f"[blender-rpc] HTTP server listening on http://{HOST}:{PORT}")
+        _http_server = MCPHTTPServer((HOST, PORT), MCPHTTPHandler)
+        _log(f"[blender-rpc] HTTP server listening on http://{HOST}:{PORT}")
         _http_server.serve_forever()
     except Exception as e:
-        print(f"[blender-rpc] Failed to start HTTP server: {e}")
+        _log(f"[blender-rpc] Failed to start HTTP server: {e}")
+
+
+def start_server_on_main_thread():
+    """
+    Start a non-blocking HTTP server polled by a Blender timer, so requests
+    are served (and code executed) on the main thread without a server thread.
+    """
+    global _http_server, _http_selector
+    try:
+        _http_server = HTTPServer((HOST, PORT), _MainThreadMCPHTTPHandler)
+        _http_selector = selectors.DefaultSelector()
+        _http_selector.register(_http_server, selectors.EVENT_READ)
+        _bpy.app.timers.register(_poll_http_server, persistent=True)
+        _log(f"[blender-rpc] HTTP server polling on http://{HOST}:{PORT}")
+    except Exception as e:
+        _log(f"[blender-rpc] Failed to start HTTP server: {e}")
+
+
+def _poll_http_server() -> float | None:
+    """
+    Timer callback on Blender's main thread. Serves pending connections.
+    Returns interval until next call, or None once the server is stopped.
+    """
+    if _http_selector is None:
+        return None
+    for _ in range(_MAX_TASKS_PER_TICK):
+        if not _http_selector.select(0):
+            break
+        _http_server._handle_request_noblock()
+    return 0.005
 
 
 def stop_server():
     """Stop the HTTP server."""
-    global _http_server
+    global _http_server, _http_selector
     if _http_server is not None:
-        _http_server.shutdown()
+        if _http_selector is not None:
+            if _bpy.app.timers.is_registered(_poll_http_server):
+                _bpy.app.timers.unregister(_poll_http_server)
+            _http_selector.close()
+            _http_selector = None
+        else:
+            _http_server.shutdown()
+        _http_server.server_close()
         _http_server = None
-        print("[blender-rpc] HTTP server stopped.")
+        _log("[blender-rpc] HTTP server stopped.")
 
 
 # ------------------------------------------------------------------
@@ -413,5 +1166,5 @@ if __name__ == "__main__":
     try:
         start_server()
     except KeyboardInterrupt:
-        print("\n[blender-rpc] Shutting down...")
+        _log("\n[blender-rpc] Shutting down...")
         stop_server()
@@ -1,4 +1,5 @@
 # Clear existing objects
+import bmesh
 import bpy
 
 # Select and delete all objects
@@ -10,6 +11,26 @@ grid_size = 10
 spacing = 2.0
 total_cubes = grid_size * grid_size
 
+# Build one cube mesh and share it between all the objects, instead of
+# running the primitive_cube_add operator once per cube
+mesh = bpy.data.meshes.new("Cube_Mesh")
+bm = bmesh.new()
+bmesh.ops.create_cube(bm, size=2.0)
+bm.to_mesh(mesh)
+bm.free()
+
+# Empty slot on the shared mesh; each object links its own material into it
+mesh.materials.append(None)
+
+# Hue depends only on i + j, so 2 * grid_size - 1 materials cover the grid
+palette = []
+for step in range(2 * grid_size - 1):
+    hue = step / (grid_size * 2)
+    mat = bpy.data.materials.new(name=f"Cube_Material_{step}")
+    mat.diffuse_color = (hue, 1.0 - hue, 1.0 - hue, 1.0)
+    palette.append(mat)
+
+collection = bpy.context.collection
 for i in range(grid_size):
     for j in range(grid_size):
         # Calculate position
@@ -17,20 +38,13 @@ for i in range(grid_size):
         y = (j - grid_size / 2) * spacing
         z = 0
 
-        # Add cube at position
-        bpy.ops.mesh.primitive_cube_add(location=(x, y, z))
-
-        # Get the newly created cube
-        cube = bpy.context.active_object
-        cube.name = f"Cube_{i}_{j}"
-
-        # Only assign materials to mesh objects (not lights, cameras, etc.)
-        if hasattr(cube.data, "materials"):
-            # Create and assign a material with a unique color
-            mat = bpy.data.materials.new(name=f"Cube_Material_{i}_{j}")
-            # Set a unique color based on position
-            hue = (i + j) / (grid_size * 2)
-            mat.diffuse_color = (hue, 1.0 - hue, 1.0 - hue, 1.0)
-            cube.data.materials.append(mat)
+        cube = bpy.data.objects.new(f"Cube_{i}_{j}", mesh)
+        cube.location = (x, y, z)
+        collection.objects.link(cube)
+
+        # Color based on position
+        slot = cube.material_slots[0]
+        slot.link = "OBJECT"
+        slot.material = palette[i + j]
 
 print(f"Created {total_cubes} cubes in a grid pattern")
@@ -1,59 +1,162 @@
 #!/usr/bin/env python3
 """
 Blender MCP Client - Execute code in Blender via MCP protocol.
+
+Reads a script from the file given as the first argument, or from stdin.
+With --multi, the input is split into several scripts on lines containing
+only "---", which are executed in order over one persistent connection;
+pass --one-shot as well to open a new connection for each script instead.
 """
 
+import atexit
+import itertools
 import json
+import re
 import sys
 import os
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 
 HOST = os.environ.get("BLENDER_HOST", "127.0.0.1")
 PORT = int(os.environ.get("BLENDER_PORT", "8765"))
 BASE_URL = f"http://{HOST}:{PORT}"
+SCRIPT_SEPARATOR = re.compile(r"^---[ \t]*$", re.MULTILINE)
 
+# Use orjson when installed; stdlib json otherwise
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+
+    def _pretty(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+
+except ImportError:
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    _loads = json.loads
+
+    def _pretty(obj) -> str:
+        return json.dumps(obj, indent=2)
+
+
+class BlenderClient:
+    """
+    MCP client that keeps one keep-alive HTTP connection to Blender.
+
+    The connection is opened lazily on the first call. Use the client as a
+    context manager, or call close() when done. A client may be shared
+    between threads; each gets its own pooled connection.
+    """
+
+    def __init__(self, base_url: str = BASE_URL):
+        self.base_url = base_url
+        self._session = None
+        self._session_lock = threading.Lock()
+        # next() on a count is atomic, so ids stay unique across threads
+        self._ids = itertools.count(1)
+
+    def _get_session(self) -> requests.Session:
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount("http://", adapter)
+                session.headers["Content-Type"] = "application/json"
+                self._session = session
+            return self._session
+
+    def rpc_call(self, method: str, params: dict) -> dict:
+        """Send JSON-RPC request to Blender MCP server via HTTP."""
+        request_data = {
+            "jsonrpc": "2.0",
+            "id": next(self._ids),
+            "method": method,
+            "params": params,
+        }
+        request_json = _dumps(request_data)
 
-def rpc_call(method: str, params: dict) -> dict:
-    """Send JSON-RPC request to Blender MCP server via HTTP."""
-    request_data = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
-    request_json = json.dumps(request_data)
-
-    try:
-        # Send request and get response
-        response = requests.post(
-            BASE_URL,
-            data=request_json,
-            headers={"Content-Type": "application/json"},
-            timeout=30,
-        )
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.HTTPError as e:
-        # Handle HTTP errors
         try:
-            error_json = e.response.json()
-            raise Exception(
-                f"HTTP Error {e.response.status_code}: {error_json.get('error', {}).get('message', 'Unknown error')}"
+            # Send request and get response
+            response = self._get_session().post(
+                self.base_url,
+                data=request_json,
+                timeout=30,
             )
-        except json.JSONDecodeError:
-            raise Exception(f"HTTP Error {e.response.status_code}: {e.response.text}")
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Connection Error: {str(e)}")
+            response.raise_for_status()
+            return _loads(response.content)
+        except requests.exceptions.HTTPError as e:
+            # Handle HTTP errors
+            try:
+                error_json = _loads(e.response.content)
+                raise Exception(
+                    f"HTTP Error {e.response.status_code}: {error_json.get('error', {}).get('message', 'Unknown error')}"
+                )
+            except json.JSONDecodeError:
+                raise Exception(f"HTTP Error {e.response.status_code}: {e.response.text}")
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Connection Error: {str(e)}")
+
+    def execute_code(self, code: str) -> dict:
+        """Execute Python code in Blender using MCP tools/call."""
+        return self.rpc_call(
+            "tools/call", {"name": "execute_code", "arguments": {"code": code}}
+        )
+
+    def close(self):
+        """Close the connection; the next call opens a new one."""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Shared by the module-level helpers so consecutive calls reuse a connection
+_default_client = BlenderClient()
+atexit.register(_default_client.close)
+
+
+def rpc_call(method: str, params: dict) -> dict:
+    """Send JSON-RPC request to Blender MCP server via HTTP."""
+    return _default_client.rpc_call(method, params)
 
 
 def execute_code(code: str) -> dict:
     """Execute Python code in Blender using MCP tools/call."""
-    return rpc_call("tools/call", {"name": "execute_code", "arguments": {"code": code}})
+    return _default_client.execute_code(code)
 
 
 def main():
-    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "--help"):
+    args = sys.argv[1:]
+    if args and args[0] in ("-h", "--help"):
         print(__doc__)
         return
 
-    code = open(sys.argv[1]).read() if len(sys.argv) > 1 else sys.stdin.read()
-    result = execute_code(code)
-    print(json.dumps(result, indent=2))
+    one_shot = "--one-shot" in args
+    multi = "--multi" in args
+    args = [arg for arg in args if arg not in ("--one-shot", "--multi")]
+
+    source = open(args[0]).read() if args else sys.stdin.read()
+    # Opt-in: a "---" line may just as well be part of a single script
+    scripts = SCRIPT_SEPARATOR.split(source) if multi else [source]
+    with BlenderClient() as client:
+        for code in scripts:
+            if not code.strip():
+                continue
+            if one_shot:
+                client.close()  # Fresh connection for every script
+            result = client.execute_code(code)
+            print(_pretty(result))
 
 
 if __name__ == "__main__":
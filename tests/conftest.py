@@ -0,0 +1,31 @@
+# shared fixtures for the blender MCP server tests
+import socket
+import threading
+import time
+
+import pytest
+
+from ..blender_rpc_http import HOST, PORT, start_server, stop_server
+
+
+def wait_for_server(port: int = PORT, timeout: float = 2):
+    """Poll until a server accepts connections rather than sleeping blindly."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection((HOST, port), timeout=0.05).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.005)
+
+
+@pytest.fixture(scope="session")
+def run_server():
+    """Start the HTTP server in a background thread, once for the whole test run."""
+    t = threading.Thread(target=start_server, daemon=True)
+    t.start()
+    wait_for_server()
+    yield
+    stop_server()
@@ -1,42 +1,307 @@
 # tests for blender MCP server
+import functools
+import http.client
 import json
+import socket
+import sys
 import threading
 import time
+import types
 import urllib.request
-import urllib.error
+from concurrent.futures import Future
 
 import pytest
 
-from ..blender_rpc_http import start_server, stop_server, HOST, PORT
+from .. import blender_rpc_http
+from ..blender_rpc_http import stop_server, HOST, PORT
+from .conftest import wait_for_server
 
 
-def rpc_call(request: dict, timeout: int = 5) -> dict:
-    """Send a JSON-RPC request over HTTP and return the parsed response."""
-    url = f"http://{HOST}:{PORT}/"
+def connect(timeout: int = 5, port: int = PORT) -> http.client.HTTPConnection:
+    """Open a connection to the test server with Nagle's algorithm disabled."""
+    conn = http.client.HTTPConnection(HOST, port, timeout=timeout)
+    conn.connect()
+    # Otherwise a small request can stall ~40 ms on the server's delayed ACK
+    conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return conn
+
+
+def rpc_call(
+    request: dict | list,
+    timeout: int = 5,
+    conn: http.client.HTTPConnection | None = None,
+) -> dict | list:
+    """
+    Send a JSON-RPC request over HTTP and return the parsed response. Uses
+    conn when given, otherwise a new connection that is closed afterwards.
+    """
     data = json.dumps(request).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    with urllib.request.urlopen(req, timeout=timeout) as resp:
+    own_conn = conn is None
+    if own_conn:
+        conn = connect(timeout)
+    try:
+        conn.request("POST", "/", data, {"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        assert resp.status == 200, resp.status
         return json.loads(resp.read().decode("utf-8"))
+    finally:
+        if own_conn:
+            conn.close()
+
+
+@pytest.fixture
+def fake_bpy(monkeypatch):
+    """Install a stand-in ``bpy`` module so the main-thread path can run."""
+    module = types.ModuleType("bpy")
+    monkeypatch.setattr(blender_rpc_http, "_bpy", module)
+    monkeypatch.setitem(blender_rpc_http._NS_TEMPLATE, "bpy", module)
+    return module
 
 
 @pytest.fixture(scope="module")
-def run_server():
-    """Start the HTTP server in a background thread for the duration of tests."""
-    t = threading.Thread(target=start_server, daemon=True)
+def client(run_server):
+    """
+    rpc_call bound to one keep-alive connection, shared by the module's
+    sequential tests so each doesn't pay for a new connection.
+    """
+    conn = connect()
+    yield functools.partial(rpc_call, conn=conn)
+    conn.close()
+
+
+@pytest.mark.parametrize("per_tick, first_interval", [(64, 0.005), (2, 0.0)])
+def test_main_thread_queue_drains_pending(fake_bpy, monkeypatch, per_tick, first_interval):
+    """Test a timer tick drains the queue, rescheduling at once on a backlog."""
+    monkeypatch.setattr(blender_rpc_http, "_MAX_TASKS_PER_TICK", per_tick)
+    results = {}
+
+    def submit(i):
+        results[i] = blender_rpc_http._execute_on_main_thread(
+            f"result = bpy.__name__ * {i}"
+        )
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+    while len(blender_rpc_http._execution_queue) < 3:
+        time.sleep(0.001)
+
+    assert blender_rpc_http._process_execution_queue() == first_interval
+    if first_interval == 0.0:
+        assert blender_rpc_http._process_execution_queue() == 0.005
+    for t in threads:
+        t.join()
+    assert {i: r.result for i, r in results.items()} == {0: "", 1: "bpy", 2: "bpybpy"}
+    assert blender_rpc_http._process_execution_queue() == 0.005
+    assert blender_rpc_http._process_execution_queue() == 0.01
+
+
+def test_main_thread_queue_skips_abandoned_requests(fake_bpy):
+    """Test requests whose caller timed out are not executed."""
+    fake_bpy.ran = False
+    future = Future()
+    blender_rpc_http._execution_queue.append(("bpy.ran = True", None, future))
+    future.cancel()
+
+    blender_rpc_http._process_execution_queue()
+    assert fake_bpy.ran is False
+    assert len(blender_rpc_http._execution_queue) == 0
+
+
+def test_main_thread_queue_survives_escaping_exceptions(fake_bpy, monkeypatch):
+    """Test exceptions escaping an execution reach the caller, not the timer."""
+    future = Future()
+    blender_rpc_http._execution_queue.append(("raise SystemExit(3)", None, future))
+    blender_rpc_http._process_execution_queue()
+    assert future.result(timeout=0).error["type"] == "SystemExit"
+
+    def interrupted(code, bindings):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(blender_rpc_http, "_run_code_sandboxed", interrupted)
+    future = Future()
+    blender_rpc_http._execution_queue.append(("result = 1", None, future))
+    blender_rpc_http._process_execution_queue()
+    assert isinstance(future.exception(timeout=0), KeyboardInterrupt)
+
+
+def test_main_thread_queue_rejects_when_full(fake_bpy, monkeypatch):
+    """Test a full execution queue is reported as busy instead of growing."""
+    monkeypatch.setattr(blender_rpc_http, "MAX_QUEUED_EXECUTIONS", 0)
+    with pytest.raises(blender_rpc_http.ServerBusyError):
+        blender_rpc_http._execute_on_main_thread("result = 1")
+    assert len(blender_rpc_http._execution_queue) == 0
+
+
+def test_main_thread_batch_rejects_oversized(fake_bpy, monkeypatch):
+    """Test a batch that could never fit the queue isn't reported as busy."""
+    monkeypatch.setattr(blender_rpc_http, "MAX_QUEUED_EXECUTIONS", 1)
+    with pytest.raises(blender_rpc_http.BatchTooLargeError):
+        blender_rpc_http._execute_on_main_thread_batch([("result = 1", None)] * 2)
+    assert len(blender_rpc_http._execution_queue) == 0
+
+    monkeypatch.setattr(blender_rpc_http, "_needs_main_thread_handoff", lambda: True)
+    call = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+            "params": {"name": "execute_code", "arguments": {"code": "result = 1"}}}
+    resp = json.loads(blender_rpc_http.handle_rpc(json.dumps([call, call])))
+    assert [r["error"]["code"] for r in resp] == [-32600, -32600]
+
+
+def test_pure_code_is_coalesced(fake_bpy, monkeypatch):
+    """Test identical concurrent pure requests share a single execution."""
+    fake_bpy.runs = []
+    fake_bpy.gate = threading.Event()
+    code = "# @pure\nbpy.runs.append(1)\nbpy.gate.wait(5)\nresult = 42"
+
+    # Count callers that found the running execution in _inflight
+    joined = threading.Semaphore(0)
+
+    class RecordingDict(dict):
+        def get(self, key, default=None):
+            value = super().get(key, default)
+            if value is not None:
+                joined.release()
+            return value
+
+    monkeypatch.setattr(blender_rpc_http, "_inflight", RecordingDict())
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(blender_rpc_http._execute_code(code)))
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    # The owner stays blocked on the gate until the other three have joined
+    for _ in range(3):
+        assert joined.acquire(timeout=5)
+    fake_bpy.gate.set()
+    for t in threads:
+        t.join()
+
+    assert fake_bpy.runs == [1]
+    assert [r.result for r in results] == [42] * 4
+    assert not blender_rpc_http._inflight
+
+    blender_rpc_http._execute_code(code)
+    assert fake_bpy.runs == [1, 1]
+
+
+def test_direct_executions_restore_stdout():
+    """Test concurrent direct executions leave sys.stdout as it was."""
+    stdout = sys.stdout
+    threads = [
+        threading.Thread(
+            target=blender_rpc_http._execute_code,
+            args=(f"import time\nprint({i})\ntime.sleep(0.01)",),
+        )
+        for i in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sys.stdout is stdout
+
+
+def test_server_diagnostics_stay_out_of_captured_output():
+    """Test server logging from another request doesn't land in a script's output."""
+    outcome = []
+    t = threading.Thread(
+        target=lambda: outcome.append(blender_rpc_http._execute_code(
+            "import time\ntime.sleep(0.3)\nprint(42)"
+        ))
+    )
     t.start()
-    time.sleep(0.5)
-    yield
-    stop_server()
+    time.sleep(0.1)
+    blender_rpc_http.handle_rpc(b'{"jsonrpc": "2.0", "id": 1, "method": "bogus"}')
+    t.join()
+
+    assert outcome[0].output == "42\n"
+
+
+def test_serve_on_main_thread(fake_bpy, monkeypatch):
+    """Test the timer-polled server answers requests without a server thread."""
+    timers = []
+    fake_bpy.app = types.SimpleNamespace(timers=types.SimpleNamespace(
+        register=lambda fn, persistent=False: timers.append(fn),
+        is_registered=lambda fn: fn in timers,
+        unregister=timers.remove,
+    ))
+    monkeypatch.setattr(blender_rpc_http, "PORT", PORT + 1)
+    # Leave the session server's handle alone for stop_server() at teardown
+    monkeypatch.setattr(blender_rpc_http, "_http_server", None)
+    monkeypatch.setattr(blender_rpc_http, "_running_in_blender", True)
+    monkeypatch.setattr(blender_rpc_http, "_timer_registered", True)
+    blender_rpc_http.start_server_on_main_thread()
+    assert timers == [blender_rpc_http._poll_http_server]
+
+    responses = []
+    url = f"http://{HOST}:{PORT + 1}/"
+    request = json.dumps({
+        "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+        "params": {"name": "execute_code", "arguments": {"code": "result = bpy.__name__"}}
+    }).encode("utf-8")
+    client = threading.Thread(
+        target=lambda: responses.append(json.loads(urllib.request.urlopen(
+            urllib.request.Request(url, data=request), timeout=5).read()))
+    )
+    client.start()
+    try:
+        while client.is_alive():
+            assert blender_rpc_http._poll_http_server() == 0.005
+            time.sleep(0.001)
+    finally:
+        blender_rpc_http.stop_server()
+    client.join()
+
+    assert timers == []
+    assert "bpy" in responses[0]["result"]["content"][0]["text"]
 
 
-def test_initialize(run_server):
+def test_busy_server_rejects_and_shuts_down():
+    """Test connections beyond max_workers get 503 without blocking shutdown."""
+    server = blender_rpc_http.MCPHTTPServer(
+        (HOST, PORT + 2), blender_rpc_http.MCPHTTPHandler, max_workers=1
+    )
+    t = threading.Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    idle = http.client.HTTPConnection(HOST, PORT + 2, timeout=5)
+    busy = http.client.HTTPConnection(HOST, PORT + 2, timeout=5)
+    try:
+        # Holds the only worker slot as an idle keep-alive connection
+        idle.request("GET", "/")
+        assert idle.getresponse().read()
+
+        busy.request("GET", "/")
+        resp = busy.getresponse()
+        assert resp.status == 503
+        assert resp.getheader("Date")
+        assert json.loads(resp.read())["error"]["code"] == -32000
+
+        # A rejected POST must still see the 503, not a connection reset
+        body = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/list"})
+        for _ in range(20):
+            post = http.client.HTTPConnection(HOST, PORT + 2, timeout=5)
+            try:
+                post.request("POST", "/", body, {"Content-Type": "application/json"})
+                assert post.getresponse().status == 503
+            finally:
+                post.close()
+    finally:
+        # In a thread, so a blocked accept loop fails the test instead of hanging it
+        stopper = threading.Thread(target=server.shutdown, daemon=True)
+        stopper.start()
+        stopper.join(timeout=5)
+        idle.close()
+        busy.close()
+    assert not stopper.is_alive()
+    server.server_close()
+
+
+def test_initialize(client):
     """Test MCP initialize handshake."""
-    resp = rpc_call({
+    resp = client({
         "jsonrpc": "2.0", "id": 1, "method": "initialize",
         "params": {"protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "test"}}
     })
@@ -45,11 +310,71 @@ def test_initialize(run_server):
     assert resp["result"]["protocolVersion"] == "2024-11-05"
     assert "serverInfo" in resp["result"]
     assert resp["result"]["serverInfo"]["name"] == "blender-mcp"
+    limits = resp["result"]["capabilities"]["experimental"]["blender"]
+    assert limits["maxQueuedExecutions"] == blender_rpc_http.MAX_QUEUED_EXECUTIONS
+
+
+def test_get_server_info(run_server):
+    """Test GET / returns the server info document."""
+    with urllib.request.urlopen(f"http://{HOST}:{PORT}/", timeout=5) as resp:
+        info = json.loads(resp.read().decode("utf-8"))
+
+    assert info["name"] == "blender-mcp"
+    assert info["protocolVersion"] == "2024-11-05"
+
+
+def test_keep_alive(run_server):
+    """Test successive requests reuse one persistent connection."""
+    conn = connect()
+    try:
+        for request_id in (15, 16):
+            body = json.dumps({"jsonrpc": "2.0", "id": request_id, "method": "tools/list"})
+            conn.request("POST", "/", body, {"Content-Type": "application/json"})
+            if request_id == 15:
+                sock = conn.sock
+            resp = conn.getresponse()
+            assert resp.getheader("Connection") == "keep-alive"
+            assert resp.getheader("Date")
+            assert resp.getheader("Server")
+            assert json.loads(resp.read())["id"] == request_id
+        assert conn.sock is sock
+    finally:
+        conn.close()
+
+
+def test_idle_timeout_is_not_logged(run_server, monkeypatch):
+    """Test an idle keep-alive connection timing out closes quietly."""
+    logged = []
+    monkeypatch.setattr(blender_rpc_http, "_log", logged.append)
+    monkeypatch.setattr(blender_rpc_http.MCPHTTPHandler, "timeout", 0.1)
+    conn = connect()
+    try:
+        conn.request("GET", "/")
+        conn.getresponse().read()
+        time.sleep(0.3)
+    finally:
+        conn.close()
 
+    assert not [line for line in logged if "timed out" in line]
 
-def test_tools_list(run_server):
+
+def test_request_too_large(run_server, monkeypatch):
+    """Test an oversized body is rejected without being read."""
+    monkeypatch.setattr(blender_rpc_http, "MAX_REQUEST_BYTES", 16)
+    conn = connect()
+    try:
+        body = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/list"})
+        conn.request("POST", "/", body, {"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        assert resp.status == 413
+        assert resp.getheader("Connection") == "close"
+    finally:
+        conn.close()
+
+
+def test_tools_list(client):
     """Test MCP tools/list method."""
-    resp = rpc_call({"jsonrpc": "2.0", "id": 2, "method": "tools/list", "params": {}})
+    resp = client({"jsonrpc": "2.0", "id": 2, "method": "tools/list", "params": {}})
 
     assert resp["id"] == 2
     tools = resp["result"]["tools"]
@@ -58,9 +383,9 @@ def test_tools_list(run_server):
     assert "execute_code" in tool_names
 
 
-def test_tools_call_execute_code(run_server):
+def test_tools_call_execute_code(client):
     """Test MCP tools/call with execute_code tool."""
-    resp = rpc_call({
+    resp = client({
         "jsonrpc": "2.0", "id": 3, "method": "tools/call",
         "params": {"name": "execute_code", "arguments": {"code": "result = 5 + 3"}}
     })
@@ -72,9 +397,9 @@ def test_tools_call_execute_code(run_server):
     assert "8" in content[0]["text"]
 
 
-def test_tools_call_with_print(run_server):
+def test_tools_call_with_print(client):
     """Test execute_code captures print output."""
-    resp = rpc_call({
+    resp = client({
         "jsonrpc": "2.0", "id": 4, "method": "tools/call",
         "params": {"name": "execute_code", "arguments": {"code": "print('hello world')"}}
     })
@@ -84,9 +409,32 @@ def test_tools_call_with_print(run_server):
     assert "hello world" in text
 
 
-def test_tools_call_error(run_server):
+def test_tools_call_functions_see_top_level_names(client):
+    """Test functions defined in submitted code can use its top-level names."""
+    code = "scale = 3\ndef f(x):\n    return x * scale\nresult = f(2)"
+    resp = client({
+        "jsonrpc": "2.0", "id": 14, "method": "tools/call",
+        "params": {"name": "execute_code", "arguments": {"code": code}}
+    })
+
+    assert "isError" not in resp["result"]
+    assert "6" in resp["result"]["content"][0]["text"]
+
+
+def test_tools_call_large_result(client):
+    """Test a response body larger than the coalescing threshold arrives intact."""
+    resp = client({
+        "jsonrpc": "2.0", "id": 17, "method": "tools/call",
+        "params": {"name": "execute_code", "arguments": {"code": "result = 'x' * 200000"}}
+    })
+
+    assert resp["id"] == 17
+    assert "x" * 200000 in resp["result"]["content"][0]["text"]
+
+
+def test_tools_call_error(client):
     """Test execute_code handles errors."""
-    resp = rpc_call({
+    resp = client({
         "jsonrpc": "2.0", "id": 5, "method": "tools/call",
         "params": {"name": "execute_code", "arguments": {"code": "raise ValueError('test error')"}}
     })
@@ -96,9 +444,125 @@ def test_tools_call_error(run_server):
     assert "test error" in resp["result"]["content"][0]["text"]
 
 
-def test_unknown_tool(run_server):
+def test_tools_call_stream_misuse(client):
+    """Test bytes written to stdout are a user error and isatty() still works."""
+    code = "import sys\nprint(sys.stdout.isatty())\nsys.stdout.write(b'x')"
+    resp = client({
+        "jsonrpc": "2.0", "id": 18, "method": "tools/call",
+        "params": {"name": "execute_code", "arguments": {"code": code}}
+    })
+
+    assert resp["result"]["isError"] is True
+    assert "must be str" in resp["result"]["content"][0]["text"]
+
+
+def test_batch_request(client):
+    """Test a JSON-RPC batch returns one response per request, in order."""
+    resp = client([
+        {"jsonrpc": "2.0", "id": 10, "method": "tools/call",
+         "params": {"name": "execute_code", "arguments": {"code": "result = 1 + 1"}}},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "id": 11, "method": "tools/list", "params": {}},
+        {"jsonrpc": "2.0", "id": 12, "method": "tools/call",
+         "params": {"name": "execute_code", "arguments": {"code": "result = 2 + 2"}}},
+    ])
+
+    assert [r["id"] for r in resp] == [10, 11, 12]
+    assert "2" in resp[0]["result"]["content"][0]["text"]
+    assert "execute_code" in [t["name"] for t in resp[1]["result"]["tools"]]
+    assert "4" in resp[2]["result"]["content"][0]["text"]
+
+
+def test_batch_request_bad_arguments(client):
+    """Test a malformed batch element only fails its own response."""
+    resp = client([
+        {"jsonrpc": "2.0", "id": 25, "method": "tools/call",
+         "params": {"name": "execute_code", "arguments": "oops"}},
+        {"jsonrpc": "2.0", "id": 26, "method": "tools/call",
+         "params": {"name": "execute_code", "arguments": {"code": "result = 3"}}},
+    ])
+
+    assert resp[0]["error"]["code"] == -32603
+    assert resp[1]["result"]["content"][0]["text"] == "Result: 3"
+
+
+def test_templates(client):
+    """Test a registered template runs with bindings, alone and in a batch."""
+    def call(req_id, name, arguments):
+        return {"jsonrpc": "2.0", "id": req_id, "method": "tools/call",
+                "params": {"name": name, "arguments": arguments}}
+
+    resp = client(call(20, "register_template", {"name": "scale", "code": "result = x * k"}))
+    assert "isError" not in resp["result"]
+
+    resp = client(call(21, "call_template", {"name": "scale", "bindings": {"x": 3, "k": 2}}))
+    assert resp["result"]["content"][0]["text"] == "Result: 6"
+
+    resp = client([
+        call(22, "call_template", {"name": "scale", "bindings": {"x": i, "k": 10}})
+        for i in range(3)
+    ] + [call(23, "call_template", {"name": "missing"})])
+    assert [r["result"]["content"][0]["text"] for r in resp[:3]] == [
+        "Result: 0", "Result: 10", "Result: 20"
+    ]
+    assert "Unknown template" in resp[3]["error"]["message"]
+
+    resp = client(call(24, "register_template", {"name": "bad", "code": "result ="}))
+    assert resp["result"]["isError"] is True
+
+    # Calls in a batch see a template re-registered earlier in that batch
+    resp = client([
+        call(28, "register_template", {"name": "scale", "code": "result = x + k"}),
+        call(29, "call_template", {"name": "scale", "bindings": {"x": 3, "k": 2}}),
+    ])
+    assert resp[1]["result"]["content"][0]["text"] == "Result: 5"
+
+
+def test_template_limit(monkeypatch):
+    """Test new template names are rejected once MAX_TEMPLATES are registered."""
+    monkeypatch.setattr(blender_rpc_http, "_TEMPLATES", {})
+    monkeypatch.setattr(blender_rpc_http, "MAX_TEMPLATES", 1)
+    register = blender_rpc_http._register_template
+
+    register({"name": "a", "code": "result = 1"})
+    register({"name": "a", "code": "result = 2"})
+    with pytest.raises(ValueError, match="Too many templates"):
+        register({"name": "b", "code": "result = 3"})
+    assert list(blender_rpc_http._TEMPLATES) == ["a"]
+
+
+def test_tools_call_error_verbose(client):
+    """Test execute_code includes the traceback only when verbose is set."""
+    code = "def f():\n    raise KeyError('deep')\nf()"
+    for verbose in (False, True):
+        resp = client({
+            "jsonrpc": "2.0", "id": 13, "method": "tools/call",
+            "params": {"name": "execute_code",
+                       "arguments": {"code": code, "verbose": verbose}}
+        })
+        text = resp["result"]["content"][0]["text"]
+        assert resp["result"]["isError"] is True
+        assert ("Traceback" in text) is verbose
+        assert ("in f" in text) is verbose
+        assert "blender_rpc_http.py" not in text
+
+
+def test_tools_call_syntax_error_verbose(client):
+    """Test a verbose syntax error shows no server frames."""
+    resp = client({
+        "jsonrpc": "2.0", "id": 27, "method": "tools/call",
+        "params": {"name": "execute_code",
+                   "arguments": {"code": "result = (", "verbose": True}}
+    })
+    text = resp["result"]["content"][0]["text"]
+    assert "SyntaxError" in text
+    assert "<mcp-exec>" in text
+    assert "blender_rpc_http.py" not in text
+
+
+def test_unknown_tool(client):
     """Test calling unknown tool returns error."""
-    resp = rpc_call({
+    resp = client({
         "jsonrpc": "2.0", "id": 6, "method": "tools/call",
         "params": {"name": "unknown_tool", "arguments": {}}
     })
@@ -108,8 +572,69 @@ def test_unknown_tool(run_server):
     assert "unknown_tool" in resp["error"]["message"].lower()
 
 
-def test_server_shutdown(run_server):
+def test_internal_error_traceback_debug(monkeypatch):
+    """Test internal errors carry a traceback only in debug mode."""
+    def fail(params):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(blender_rpc_http._MCP_METHODS, "test/fail", fail)
+    request = b'{"jsonrpc": "2.0", "id": 1, "method": "test/fail"}'
+
+    error = json.loads(blender_rpc_http.handle_rpc(request))["error"]
+    assert error == {"code": -32603, "message": "boom"}
+
+    monkeypatch.setattr(blender_rpc_http, "DEBUG_ERRORS", True)
+    error = json.loads(blender_rpc_http.handle_rpc(request))["error"]
+    assert "RuntimeError: boom" in error["data"]
+
+
+@pytest.mark.parametrize("method", ["tools/list", "bogus"])
+def test_wide_integer_id_is_echoed_exactly(method):
+    """Test ids beyond 64 bits come back unchanged, whatever the JSON codec."""
+    request = b'{"jsonrpc": "2.0", "id": 18446744073709551616, "method": "%s"}'
+    response = blender_rpc_http.handle_rpc(request % method.encode())
+    assert b'"id":18446744073709551616' in response.replace(b" ", b"")
+
+    batch = b"[" + request % method.encode() + b"]"
+    response = blender_rpc_http.handle_rpc(batch)
+    assert json.loads(response)[0]["id"] == 18446744073709551616
+
+
+def test_concurrent_requests(run_server):
+    """Test a slow tool call does not block other clients."""
+    slow_done = threading.Event()
+
+    def slow_call():
+        rpc_call({
+            "jsonrpc": "2.0", "id": 7, "method": "tools/call",
+            "params": {"name": "execute_code", "arguments": {"code": "import time; time.sleep(1)"}}
+        })
+        slow_done.set()
+
+    t = threading.Thread(target=slow_call)
+    t.start()
+    time.sleep(0.1)
+    resp = rpc_call({"jsonrpc": "2.0", "id": 8, "method": "initialize", "params": {}})
+    assert resp["id"] == 8
+    assert not slow_done.is_set()
+    t.join()
+
+
+def test_server_shutdown(monkeypatch):
     """Test that the server can be shut down properly."""
-    resp = rpc_call({"jsonrpc": "2.0", "id": 99, "method": "initialize", "params": {}})
-    assert resp["id"] == 99
+    # Own instance on another port, so the session server stays up
+    monkeypatch.setattr(blender_rpc_http, "PORT", PORT + 3)
+    monkeypatch.setattr(blender_rpc_http, "_http_server", None)
+    t = threading.Thread(target=blender_rpc_http.start_server, daemon=True)
+    t.start()
+    wait_for_server(PORT + 3)
+
+    conn = connect(port=PORT + 3)
+    try:
+        request = {"jsonrpc": "2.0", "id": 99, "method": "initialize", "params": {}}
+        assert rpc_call(request, conn=conn)["id"] == 99
+    finally:
+        conn.close()
     stop_server()
+    t.join(timeout=5)
+    assert not t.is_alive()
@@ -0,0 +1,97 @@
+# tests for the blender MCP client
+import io
+import json
+import threading
+
+import pytest
+
+from .. import mcp_client
+from ..blender_rpc_http import HOST, PORT
+from ..mcp_client import BlenderClient
+
+BASE_URL = f"http://{HOST}:{PORT}"
+
+
+def test_rpc_call(run_server):
+    """Test rpc_call returns the server's JSON-RPC response."""
+    with BlenderClient(BASE_URL) as client:
+        resp = client.rpc_call("tools/list", {})
+
+    assert resp["id"] == 1
+    assert "execute_code" in [t["name"] for t in resp["result"]["tools"]]
+
+
+def test_execute_code(run_server):
+    """Test execute_code runs code through tools/call."""
+    with BlenderClient(BASE_URL) as client:
+        resp = client.execute_code("result = 6 * 7")
+
+    assert resp["result"]["content"][0]["text"] == "Result: 42"
+
+
+def test_ids_are_distinct_across_threads(run_server):
+    """Test concurrent calls on one shared client never reuse an id."""
+    ids = []
+    with BlenderClient(BASE_URL) as client:
+
+        def call():
+            for _ in range(10):
+                ids.append(client.rpc_call("tools/list", {})["id"])
+
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert sorted(ids) == list(range(1, 81))
+
+
+def test_close_then_call_opens_new_session(run_server):
+    """Test a call after close() opens a fresh session."""
+    client = BlenderClient(BASE_URL)
+    try:
+        client.rpc_call("tools/list", {})
+        first = client._session
+        client.close()
+        assert client._session is None
+
+        resp = client.rpc_call("tools/list", {})
+        assert resp["id"] == 2
+        assert client._session is not None
+        assert client._session is not first
+    finally:
+        client.close()
+
+
+def test_context_manager_closes_session(run_server):
+    """Test leaving the with block closes the client's session."""
+    with BlenderClient(BASE_URL) as client:
+        client.rpc_call("tools/list", {})
+        assert client._session is not None
+
+    assert client._session is None
+
+
+@pytest.mark.parametrize("flags, source, results", [
+    # Without --multi, a "---" line inside a string stays part of the script
+    ([], 's = """\n---\n"""\nresult = len(s)\n', ["Result: 5"]),
+    (["--multi"], "result = 1\n---\nresult = 0\n", ["Result: 1", "Result: 0"]),
+])
+def test_main_splits_scripts_only_with_multi(
+    run_server, monkeypatch, capsys, flags, source, results
+):
+    """Test a "---" line only separates scripts when --multi is given."""
+    monkeypatch.setattr("sys.stdin", io.StringIO(source))
+    monkeypatch.setattr("sys.argv", ["mcp_client.py", *flags])
+    mcp_client.main()
+
+    # main() prints each response as indented JSON, one after another
+    decoder = json.JSONDecoder()
+    out = capsys.readouterr().out.strip()
+    texts = []
+    while out:
+        response, end = decoder.raw_decode(out)
+        texts.append(response["result"]["content"][0]["text"])
+        out = out[end:].strip()
+    assert texts == results